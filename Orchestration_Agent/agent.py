@@ -14,7 +14,7 @@ from google.adk.tools.tool_context import ToolContext
 from Smart_Waste_Inventory.agent import root_agent as Smart_Waste_Inventory_Agent
 from Sustainable_Procurement.agent import root_agent as sustainable_procurement_Agent 
 #sys.path.append(".")
-from callback_logging import log_query_to_model, log_model_response
+from callback_logging import log_query_to_model, log_model_response_with_prefetch
 
 
 # Load environment variables
@@ -117,7 +117,8 @@ root_agent = Agent(
     """,
     
     #before_model_callback=log_query_to_model,
-    after_model_callback=log_model_response,
+    # Also starts loading a sub-agent's tables as soon as the model routes to it, before its first tool call
+    after_model_callback=log_model_response_with_prefetch,
     # Add the function tools below
     tools=[get_supplier_product_purchase_data],
      # Add the sub_agents parameter when instructed below this line
@@ -1,10 +1,10 @@
 import os
-import csv
 from dotenv import load_dotenv
 from google.adk.agents import Agent
-from google.cloud import storage
 #sys.path.append(".")
-from callback_logging import log_query_to_model, log_model_response
+from callback_logging import log_query_to_model, log_model_response_with_prefetch
+from data_prefetch import load_rows, load_slice, register_prefetch_tables
+from replenishment import load_tables, iter_plan
 # Load environment variables
 load_dotenv()
 
@@ -24,24 +24,15 @@ def get_inventory(product_id: str) -> dict:
         dict: status and result or error msg.
     """
     filename = "inventory_data.csv"
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    # Check if the blob (file) actually exists
-    if not blob.exists():
-        #print(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-        try:
-            with blob.open(mode='r') as file:
-                reader = csv.DictReader(file)
-                if product_id:
-                    return {"status": "success", "records": [row for row in reader if row["product_id"] == product_id]}
-                else:
-                    return {"status": "success", "records": [row for row in reader]}
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+    try:
+        if product_id:
+            return {"status": "success", "records": load_slice(filename, "product_id", product_id)}
+        else:
+            return {"status": "success", "records": load_rows(filename)}
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 # Tool: Get Sales History
 def get_saleshistory(product_id: str) -> dict:
@@ -52,21 +43,12 @@ def get_saleshistory(product_id: str) -> dict:
         dict: status and result or error msg.
     """
     filename = "sales_data.csv"
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-     # Check if the blob (file) actually exists
-    if not blob.exists():
-        #print(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-        try:
-            with blob.open(mode='r') as file:
-                reader = csv.DictReader(file)
-                return {"status": "success", "records": [row for row in reader if row["product_id"] == product_id]}
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+    try:
+        return {"status": "success", "records": load_slice(filename, "product_id", product_id)}
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 # Tool: Get Waste Records
 def get_wasterecords(product_id: str) -> dict:
@@ -77,21 +59,12 @@ def get_wasterecords(product_id: str) -> dict:
         dict: status and result or error msg.
     """
     filename = "waste_data.csv"
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-     # Check if the blob (file) actually exists
-    if not blob.exists():
-        #print(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-        try:
-            with blob.open(mode='r') as file:
-                reader = csv.DictReader(file)
-                return {"status": "success", "records": [row for row in reader if row["product_id"] == product_id]}
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+    try:
+        return {"status": "success", "records": load_slice(filename, "product_id", product_id)}
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 # Tool: Get Weather Data
 def get_weatherdata(store_id: str) -> dict:
@@ -102,20 +75,36 @@ def get_weatherdata(store_id: str) -> dict:
         dict: status and result or error msg.
     """
     filename = "weather_data.csv"
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    # Check if the blob (file) actually exists
-    if not blob.exists():
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-        try:
-            with blob.open(mode='r') as file:
-                reader = csv.DictReader(file)
-                return {"status": "success", "records": [row for row in reader if row["store_id"] == store_id]}
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+    try:
+        return {"status": "success", "records": load_slice(filename, "store_id", store_id)}
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+# Tables prefetched when the orchestrator delegates to this agent, with the id column to index
+prefetch_tables = {
+    "inventory_data.csv": "product_id",
+    "sales_data.csv": "product_id",
+    "waste_data.csv": "product_id",
+    "weather_data.csv": "store_id",
+}
+
+# Tool: Plan Replenishment
+def plan_replenishment(product_id: str) -> dict:
+    """Compute demand forecast, expected waste and recommended order quantity for every location of a product, or of all products.
+    Args:
+        product_id (str): The id of the product to plan. Provide no product id to plan all products.
+    Returns:
+        dict: status and result or error msg.
+    """
+    try:
+        tables = load_tables()
+        records = list(iter_plan(tables, product_id or None))
+        records.sort(key=lambda record: (record["product_id"], record["location_id"]))
+        return {"status": "success", "records": records}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 
 # Agent Definition
@@ -136,6 +125,8 @@ root_agent = Agent(
     - always use get_wasterecords tool to fetch waste data for each product (store_id, date, product_id, waste_quantity, reason, disposal_method, waste_cost)
     - always use get_weatherdata tool to fetch Weather data for each store. All store locations for a product is available in the sales data
             -(store_id, date, temp_high, temp_low, precipitation, humidity, special_event)
+    - always use plan_replenishment tool when asked to recommend order quantities, forecast demand or expected waste. Provide no product id to plan all products at once
+            -(product_id, location_id, on_hand, avg_daily_demand, forecast_demand, expected_waste, expected_waste_cost, safety_stock, recommended_order_qty, supplier_id, order_cost)
 
     Use the following formulas and logic:
 
@@ -202,6 +193,8 @@ root_agent = Agent(
 
     If any tool fails or data is missing, inform the user politely and suggest corrective steps.
     """,
-    after_model_callback=log_model_response,
-    tools=[get_inventory, get_saleshistory, get_wasterecords, get_weatherdata]
-)
\ No newline at end of file
+    after_model_callback=log_model_response_with_prefetch,
+    tools=[get_inventory, get_saleshistory, get_wasterecords, get_weatherdata, plan_replenishment]
+)
+
+register_prefetch_tables(root_agent.name, prefetch_tables)
@@ -20,7 +20,8 @@ from google.adk.tools.tool_context import ToolContext
 from google.cloud import storage
 from google.adk.runners import Runner
 sys.path.append(".")
-from callback_logging import log_query_to_model, log_model_response
+from callback_logging import log_query_to_model, log_model_response_with_prefetch
+from data_prefetch import load_slice, register_prefetch_tables
 load_dotenv()
 google_cloud_project = os.getenv("PROJECT_ID")
 google_cloud_location = os.getenv("GOOGLE_CLOUD_LOCATION")
@@ -51,30 +52,16 @@ def get_vendor_list(product_id: str, location: str) ->dict:
         dict: status and result or error msg.
     """
     filename = 'suppliers.csv'
-    #file_path = f"gs://{bucket_name}/{folder_path}/{filename}"
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    # Check if the blob (file) actually exists
-    if not blob.exists():
-        #print(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-       
-        try:
-            #with open(file_path, mode='r') as file:
-            with blob.open(mode="r") as file:
-            
-                reader = csv.DictReader(file)  # Reads the file as a dictionary
-                if location:
-                    matching_records = [row for row in reader if row["product_id"] == product_id and row["location"] == location]
-                    return {"status": "success", "matchingrecords": matching_records} 
-                else:
-                    return {"status": "success", "matchingrecords": [row for row in reader if row["product_id"] == product_id]  }
-                    
-        except FileNotFoundError as e:
-            return {"status": "error", "Exception": e}
+    try:
+        records = load_slice(filename, "product_id", product_id)
+        if location:
+            matching_records = [row for row in records if row["location"] == location]
+            return {"status": "success", "matchingrecords": matching_records} 
+        else:
+            return {"status": "success", "matchingrecords": records}
+                
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
             
 #Fetch function to get the supplier certifications
 def get_supplier_certifications(supplier_id: str) -> dict:
@@ -114,28 +101,14 @@ def get_supplier_emissions(supplier: str) -> dict:
         dict: status and result or error msg.
     """
     filename = 'supplier_emissions.csv'    
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    # Check if the blob (file) actually exists
-    if not blob.exists():
-        #print(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-        try:
-            with blob.open(mode='r') as file:
-            
-                reader = csv.DictReader(file)  # Reads the file as a dictionary
-            
-                for row in reader:
-                    if row["supplier_id"] == supplier:
-                        
-                        return {"status": "success",  "supplier": supplier, "Scope 1 Emissions": row["Scope1_emissions"], "Scope 2 Emissions": row["Scope2_emissions"], "Water USage": row["Water_Usage_m3"],"last_updated": row["Reporting Year"]}
-                    
-                    
-        except Exception as e:
-           return {"status": "error", "Exception": e}
+    try:
+        for row in load_slice(filename, "supplier_id", supplier):
+            return {"status": "success",  "supplier": supplier, "Scope 1 Emissions": row["Scope1_emissions"], "Scope 2 Emissions": row["Scope2_emissions"], "Water USage": row["Water_Usage_m3"],"last_updated": row["Reporting Year"]}
+                
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
+    except Exception as e:
+       return {"status": "error", "Exception": e}
 
 
 #Fetch function to get the normalized esg score of a supplier
@@ -148,45 +121,31 @@ def get_esg_score(supplier: str) ->dict:
     """
     filename = 'suppliers_esg_data.csv'
     
-    #file_path = f"gs://{bucket_name}/{folder_path}/{filename}"
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    # Check if the blob (file) actually exists
-    if not blob.exists():
-        #print(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-        try:
-            with blob.open(mode='r') as file:
-            
-                reader = csv.DictReader(file)  # Reads the file as a dictionary
-            
-                for row in reader:
-                    if row["Supplier Id"] == supplier:
-                    
-                        if row["Provider"] == "EcoVadis":
-                            esg_score = row["Overall score"]
-                        elif row["Provider"] == "Sustainalytics":
-                            esg_score = max(0, 100-row["Risk Score"])
-                        elif row["Provider"] == "MSCI":
-                            esg_score = lambda grade:{
-                                    "AAA":100,"AA": 90, "A": 80,
-                                    "BBB":70, "BB":60, "B":40,
-                                    "CCC":20
-                                }.get(grade.upper(), 0)(row["Rating"])
-                        else:
-                            esg_score = None
-                        if esg_score is not None:
-                            
-                            return {"status": "success", "provider": row["Provider"], "supplier": supplier, "esg_score": esg_score, "last_updated": row["Reporting Year"]}
-                        else:
-                            return {"status": f"Failed processing for {supplier}"}
-                    
-           
-        except Exception as e:
-            return {"status": "error", "Exception": e}
+    try:
+        for row in load_slice(filename, "Supplier Id", supplier):
+        
+            if row["Provider"] == "EcoVadis":
+                esg_score = row["Overall score"]
+            elif row["Provider"] == "Sustainalytics":
+                esg_score = max(0, 100-row["Risk Score"])
+            elif row["Provider"] == "MSCI":
+                esg_score = lambda grade:{
+                        "AAA":100,"AA": 90, "A": 80,
+                        "BBB":70, "BB":60, "B":40,
+                        "CCC":20
+                    }.get(grade.upper(), 0)(row["Rating"])
+            else:
+                esg_score = None
+            if esg_score is not None:
+                
+                return {"status": "success", "provider": row["Provider"], "supplier": supplier, "esg_score": esg_score, "last_updated": row["Reporting Year"]}
+            else:
+                return {"status": f"Failed processing for {supplier}"}
+        
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
+    except Exception as e:
+        return {"status": "error", "Exception": e}
 
 #Fetch function to get the supplier audit score
 def get_supplier_auditscore(supplier: str) -> dict:
@@ -197,27 +156,14 @@ def get_supplier_auditscore(supplier: str) -> dict:
         dict: status and result or error msg.
     """
     filename = 'supplier_audits.csv'    
-    blob_name = f"{folder_path}/{filename}"
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    # Check if the blob (file) actually exists
-    if not blob.exists():
-        #print(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
-        return {"status": "error", "Exception": f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'."}
-    else:
-        try:
-            with blob.open(mode='r') as file:
-            
-                reader = csv.DictReader(file)  # Reads the file as a dictionary
-            
-                for row in reader:
-                    if row["supplier_id"] == supplier:
-                        return {"status": "success",  "supplier": supplier, "Audit Score": row["score"]}
-                                     
-            
-        except Exception as e:
-            return {"status": "error", "Exception": e}
+    try:
+        for row in load_slice(filename, "supplier_id", supplier):
+            return {"status": "success",  "supplier": supplier, "Audit Score": row["score"]}
+                             
+    except FileNotFoundError as e:
+        return {"status": "error", "Exception": str(e)}
+    except Exception as e:
+        return {"status": "error", "Exception": e}
 
 #Fetch function to predict the risk factor of a supplier
 def predict_supplier_risk(supplier: str) ->dict:
@@ -233,6 +179,14 @@ def predict_supplier_risk(supplier: str) ->dict:
         return {"status": "error"}  
 
 
+# Tables prefetched when the orchestrator delegates to this agent, with the id column to index
+prefetch_tables = {
+    "suppliers.csv": "product_id",
+    "suppliers_esg_data.csv": "Supplier Id",
+    "supplier_emissions.csv": "supplier_id",
+    "supplier_audits.csv": "supplier_id",
+}
+
 root_agent = Agent(
     name="sustainable_procurement_Agent",
     model=model_name,
@@ -262,11 +216,10 @@ root_agent = Agent(
     """,
    # output_key = "SustainableSuppliers",
     #before_model_callback=log_query_to_model,
-    after_model_callback=log_model_response,
+    after_model_callback=log_model_response_with_prefetch,
     # Add the function tools below
     tools=[get_vendor_list,get_esg_score, get_supplier_emissions,get_supplier_auditscore]
        
 )
 
-
-
+register_prefetch_tables(root_agent.name, prefetch_tables)
@@ -4,6 +4,7 @@ import google.cloud.logging
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmResponse, LlmRequest
 import requests
+from data_prefetch import prefetch_for_agent, end_turn, prefetch_stats
  
 # Global variable to store token count
 total_token_count = 0
@@ -75,4 +76,29 @@ def log_model_response(callback_context: CallbackContext, llm_response: LlmRespo
             logging.info(f"Error: {result['message']} ")
        
     else:
-        logging.info("[Token Usage] No usage metadata found.")
\ No newline at end of file
+        logging.info("[Token Usage] No usage metadata found.")
+
+
+def _prompt_text(callback_context: CallbackContext) -> str:
+    content = getattr(callback_context, "user_content", None)
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+#after_model_callback for all agents: prefetches a sub-agent's tables on delegation, drops them at the end of its turn
+def log_model_response_with_prefetch(callback_context: CallbackContext, llm_response: LlmResponse):
+    parts = llm_response.content.parts if llm_response.content and llm_response.content.parts else []
+    function_calls = [part.function_call for part in parts if part.function_call]
+    if parts and not function_calls and end_turn(callback_context.agent_name):
+        logging.info(f"[prefetch stats after {callback_context.agent_name}]: {prefetch_stats()}")
+    for function_call in function_calls:
+        if function_call.name != "transfer_to_agent":
+            continue
+        # Handing control on also ends the current agent's turn
+        if end_turn(callback_context.agent_name):
+            logging.info(f"[prefetch stats after {callback_context.agent_name}]: {prefetch_stats()}")
+        agent_name = (function_call.args or {}).get("agent_name")
+        started = prefetch_for_agent(agent_name, _prompt_text(callback_context))
+        if started:
+            logging.info(f"[prefetch for {agent_name}]: started {started}")
+    return log_model_response(callback_context, llm_response)
@@ -0,0 +1,206 @@
+import os
+import io
+import re
+import csv
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from google.cloud import storage
+# Load environment variables
+load_dotenv()
+
+bucket_name = os.getenv("BUCKET_NAME")
+folder_path = "input" #change name according your folder name
+
+_executor = None
+_lock = threading.RLock()
+# agent name -> {filename: column to index for ids named in the prompt}
+_prefetch_plan = {}
+# filename -> prefetched entry, alive from a delegation until the end of the sub-agent's turn
+_entries = {}
+# tables already counted as a hit or miss since their last delegation
+_counted_reads = set()
+_stats = {"table_hits": 0, "table_misses": 0, "slice_hits": 0, "prefetched_tables": 0,
+          "used_tables": 0, "prefetched_bytes": 0, "wasted_bytes": 0}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Started on first prefetch so that importing the loader does not start threads
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+        return _executor
+
+
+def _download(filename: str):
+    """Download a csv file from the input folder of the bucket.
+    Returns:
+        tuple: rows of the file as dictionaries and the size of the file in bytes.
+    """
+    blob_name = f"{folder_path}/{filename}"
+    storage_client = storage.Client()
+    bucket = storage_client.bucket(bucket_name)
+    blob = bucket.blob(blob_name)
+    # Check if the blob (file) actually exists
+    if not blob.exists():
+        raise FileNotFoundError(f"Error: Object '{blob_name}' not found in bucket '{bucket_name}'.")
+    data = blob.download_as_bytes()
+    return list(csv.DictReader(io.StringIO(data.decode("utf-8-sig")))), len(data)
+
+
+def _prompt_matches(prompt: str, values) -> list:
+    """Returns the values mentioned as whole words in the prompt."""
+    if not prompt:
+        return []
+    return [value for value in values
+            if value and re.search(r"(?<!\w)" + re.escape(value) + r"(?!\w)", prompt, re.IGNORECASE)]
+
+
+def _load_entry(filename: str, column: str, prompt: str) -> dict:
+    rows, size = _download(filename)
+    slices = {}
+    if column:
+        # Index only the ids named in the prompt, these are what the sub-agent will look up first
+        for value in _prompt_matches(prompt, {row.get(column) for row in rows}):
+            slices[value] = [row for row in rows if row.get(column) == value]
+    with _lock:
+        _stats["prefetched_bytes"] += size
+    return {"rows": rows, "size": size, "column": column, "slices": slices}
+
+
+def _copy(rows) -> list:
+    # Callers get their own rows so that none of them can change the warm copy
+    return [dict(row) for row in rows]
+
+
+def _count_wasted(future):
+    if future.exception() is None:
+        with _lock:
+            _stats["wasted_bytes"] += future.result()["size"]
+
+
+def _discard(filename: str):
+    entry = _entries.pop(filename, None)
+    # A table that was prefetched but never read is wasted work, counted once its load completes
+    if entry is not None and not entry["used"]:
+        entry["future"].add_done_callback(_count_wasted)
+
+
+def register_prefetch_tables(agent_name: str, tables: dict):
+    """Declare the tables to prefetch when the orchestrator delegates to an agent.
+    Args:
+        agent_name (str): The name of the sub-agent.
+        tables (dict): filename -> column to index for ids named in the prompt (or None).
+    """
+    _prefetch_plan[agent_name] = tables
+
+
+def prefetch_for_agent(agent_name: str, prompt: str = "") -> list:
+    """Start background loads of an agent's tables, replacing any copies left from an earlier delegation.
+    Args:
+        agent_name (str): The name of the sub-agent being delegated to.
+        prompt (str): The user prompt, used to pick the index slices to build.
+    Returns:
+        list: filenames for which a load was started.
+    """
+    tables = _prefetch_plan.get(agent_name, {})
+    with _lock:
+        for filename, column in tables.items():
+            _discard(filename)
+            _entries[filename] = {
+                "future": _get_executor().submit(_load_entry, filename, column, prompt),
+                "used": False,
+            }
+            _counted_reads.discard(filename)
+            _stats["prefetched_tables"] += 1
+    return list(tables)
+
+
+def end_turn(agent_name: str) -> bool:
+    """Drop an agent's prefetched tables once it has finished its turn, so later reads go to the bucket again.
+    Args:
+        agent_name (str): The name of the sub-agent whose turn ended.
+    Returns:
+        bool: True if the agent has prefetched tables.
+    """
+    if agent_name not in _prefetch_plan:
+        return False
+    with _lock:
+        for filename in _prefetch_plan[agent_name]:
+            _discard(filename)
+            _counted_reads.discard(filename)
+    return True
+
+
+def _take(filename: str):
+    """Returns the prefetched table if one is warm or in flight, waiting for it to complete."""
+    with _lock:
+        entry = _entries.get(filename)
+    loaded = None
+    if entry is not None:
+        try:
+            loaded = entry["future"].result()
+        except Exception:
+            # A failed prefetch falls back to a direct load so the tool reports the error itself
+            with _lock:
+                if _entries.get(filename) is entry:
+                    _entries.pop(filename)
+    with _lock:
+        if loaded and not entry["used"]:
+            entry["used"] = True
+            _stats["used_tables"] += 1
+        # Only the first read after a delegation says whether the prefetch helped
+        if filename not in _counted_reads:
+            _counted_reads.add(filename)
+            _stats["table_hits" if loaded else "table_misses"] += 1
+    return loaded
+
+
+def load_rows(filename: str) -> list:
+    """Returns all rows of a csv file from the input folder of the bucket, using the prefetched copy if there is one.
+    Args:
+        filename (str): The name of the csv file.
+    Returns:
+        list: rows of the file as dictionaries.
+    """
+    loaded = _take(filename)
+    if loaded:
+        return _copy(loaded["rows"])
+    return _download(filename)[0]
+
+
+def load_slice(filename: str, column: str, value: str) -> list:
+    """Returns the rows of a csv file where column equals value, using the prefetched index slice if there is one.
+    Args:
+        filename (str): The name of the csv file.
+        column (str): The column to filter on.
+        value (str): The value to match.
+    Returns:
+        list: matching rows as dictionaries.
+    """
+    loaded = _take(filename)
+    if loaded and loaded["column"] == column and value in loaded["slices"]:
+        with _lock:
+            _stats["slice_hits"] += 1
+        return _copy(loaded["slices"][value])
+    if loaded:
+        return _copy(row for row in loaded["rows"] if row[column] == value)
+    return [row for row in _download(filename)[0] if row[column] == value]
+
+
+def prefetch_stats() -> dict:
+    """Returns prefetch hit rate, share of prefetched tables used and wasted bytes so far.
+    Returns:
+        dict: hit counters, hit rate, used ratio, prefetched and wasted bytes.
+    """
+    with _lock:
+        stats = dict(_stats)
+        # Tables of a turn still in progress are not counted as wasted until the turn ends
+        stats["pending_bytes"] = sum(entry["future"].result()["size"] for entry in _entries.values()
+                                     if not entry["used"] and entry["future"].done()
+                                     and entry["future"].exception() is None)
+    reads = stats["table_hits"] + stats["table_misses"]
+    stats["hit_rate"] = round(stats["table_hits"] / reads, 4) if reads else 0.0
+    stats["used_ratio"] = round(stats["used_tables"] / stats["prefetched_tables"], 4) if stats["prefetched_tables"] else 0.0
+    return stats
@@ -0,0 +1,230 @@
+import os
+import csv
+import sys
+import math
+import argparse
+import statistics
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+INVENTORY_FILE = "inventory_data.csv"
+SALES_FILE = "sales_data.csv"
+WASTE_FILE = "waste_data.csv"
+PURCHASE_FILE = "supplier_product_purchase_data.csv"
+
+# Defaults for the planning run
+DEFAULT_HORIZON_DAYS = 30
+DEFAULT_SERVICE_Z = 1.65 # ~95% service level
+
+PLAN_FIELDS = [
+    "product_id", "location_id", "on_hand", "days_to_expiry", "unit_cost", "demand_share",
+    "avg_daily_demand", "demand_std", "forecast_demand", "sellable_before_expiry",
+    "expected_waste", "expected_waste_cost", "historical_waste_rate", "safety_stock",
+    "recommended_order_qty", "supplier_id", "supplier_unit_cost", "order_cost",
+]
+
+
+def _read_csv(filename: str, input_dir: str = None) -> list:
+    """Read a csv file either from a local folder or from the input folder of the bucket (prefetched copy if warm).
+    Args:
+        filename (str): The name of the csv file.
+        input_dir (str): Local folder holding the file. Reads from the bucket if empty.
+    Returns:
+        list: rows of the file as dictionaries.
+    """
+    if input_dir:
+        with open(os.path.join(input_dir, filename), mode='r', newline='', encoding='utf-8-sig') as file:
+            return list(csv.DictReader(file))
+    # Imported here so that the batch job on local files needs neither the bucket client nor the agents
+    from data_prefetch import load_rows
+    return load_rows(filename)
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_tables(input_dir: str = None) -> dict:
+    """Load the four tables needed by the planner.
+    Args:
+        input_dir (str): Local folder holding the csv files. Reads from the bucket if empty.
+    Returns:
+        dict: inventory, sales, waste and purchase rows.
+    """
+    return {
+        "inventory": _read_csv(INVENTORY_FILE, input_dir),
+        "sales": _read_csv(SALES_FILE, input_dir),
+        "waste": _read_csv(WASTE_FILE, input_dir),
+        "purchase": _read_csv(PURCHASE_FILE, input_dir),
+    }
+
+
+def partition_by_product(tables: dict, product_id: str = None) -> list:
+    """Split the tables into one work unit per product so that each worker only receives its own rows.
+    Args:
+        tables (dict): Output of load_tables.
+        product_id (str): Restrict the plan to a single product. Plans all products if empty.
+    Returns:
+        list: (product_id, slices) tuples, one per product held in inventory.
+    """
+    slices = defaultdict(lambda: {"inventory": [], "sales": [], "waste": [], "purchase": []})
+    for name, rows in tables.items():
+        for row in rows:
+            slices[row["product_id"]][name].append(row)
+    products = [product_id] if product_id else sorted(slices)
+    # Only products held somewhere can be replenished
+    return [(product, slices[product]) for product in products if slices[product]["inventory"]]
+
+
+def plan_product(product_id: str, slices: dict, horizon_days: int = DEFAULT_HORIZON_DAYS,
+                 service_z: float = DEFAULT_SERVICE_Z) -> list:
+    """Compute demand forecast, expected waste and recommended order quantity for every location of a product.
+    Daily demand is the mean of `units_sold` summed per date across stores, as in the Smart_Waste_Inventory_Agent
+    instructions, and stock not sold before expiry is projected waste.
+    Sales are recorded per store and inventory per location with no mapping between the two, so the product
+    demand is split evenly across the locations holding the product.
+    Args:
+        product_id (str): The id of the product.
+        slices (dict): inventory, sales, waste and purchase rows of the product.
+        horizon_days (int): Number of days the order has to cover.
+        service_z (float): Safety factor applied to demand volatility.
+    Returns:
+        list: one plan record per location of the product.
+    """
+    # Several stores report on the same date, demand is the total sold per date
+    daily_sales = defaultdict(float)
+    for row in slices["sales"]:
+        daily_sales[row["date"]] += _to_float(row["units_sold"])
+    daily_totals = list(daily_sales.values())
+    product_daily_demand = statistics.mean(daily_totals) if daily_totals else 0.0
+    product_demand_std = statistics.pstdev(daily_totals) if len(daily_totals) > 1 else 0.0
+
+    total_waste = sum(_to_float(row["waste_quantity"]) for row in slices["waste"])
+    total_sold = sum(daily_totals)
+    historical_waste_rate = total_waste / (total_sold + total_waste) if (total_sold + total_waste) > 0 else 0.0
+
+    # Cheapest supplier for the product
+    supplier_id, supplier_unit_cost = "", None
+    for row in slices["purchase"]:
+        cost = _to_float(row["unit_cost"], None)
+        if cost is not None and (supplier_unit_cost is None or cost < supplier_unit_cost):
+            supplier_id, supplier_unit_cost = row["supplier_id"], cost
+
+    # The same product can have several inventory batches at one location
+    locations = defaultdict(list)
+    for row in slices["inventory"]:
+        locations[row["location_id"]].append(row)
+
+    # No store -> location mapping exists, fall back to an even split of the product demand
+    demand_share = 1.0 / len(locations)
+
+    records = []
+    for location_id, batches in locations.items():
+        avg_daily_demand = product_daily_demand * demand_share
+        demand_std = product_demand_std * demand_share
+        forecast_demand = avg_daily_demand * horizon_days
+        safety_stock = service_z * demand_std * math.sqrt(horizon_days)
+
+        on_hand = 0.0
+        sellable = 0.0
+        covering_stock = 0.0
+        expected_waste = 0.0
+        expected_waste_cost = 0.0
+        stock_value = 0.0
+        # Batches closest to expiry are sold first
+        for batch in sorted(batches, key=lambda b: _to_float(b["days_to_expiry"])):
+            quantity = _to_float(batch["quantity"])
+            days_to_expiry = _to_float(batch["days_to_expiry"])
+            unit_cost = _to_float(batch["unit_cost"])
+            sold = min(quantity, max(0.0, avg_daily_demand * days_to_expiry - sellable))
+            on_hand += quantity
+            sellable += sold
+            # Stock still unexpired at the end of the horizon covers demand and safety stock in full,
+            # a batch expiring within the horizon only covers what sells before it expires
+            covering_stock += quantity if days_to_expiry >= horizon_days else sold
+            expected_waste += quantity - sold
+            expected_waste_cost += (quantity - sold) * unit_cost
+            stock_value += quantity * unit_cost
+
+        recommended_order_qty = max(0, math.ceil(forecast_demand + safety_stock - covering_stock))
+        records.append({
+            "product_id": product_id,
+            "location_id": location_id,
+            "on_hand": on_hand,
+            "days_to_expiry": min(_to_float(b["days_to_expiry"]) for b in batches),
+            "unit_cost": round(stock_value / on_hand, 4) if on_hand else 0.0,
+            "demand_share": round(demand_share, 4),
+            "avg_daily_demand": round(avg_daily_demand, 4),
+            "demand_std": round(demand_std, 4),
+            "forecast_demand": round(forecast_demand, 2),
+            "sellable_before_expiry": round(sellable, 2),
+            "expected_waste": round(expected_waste, 2),
+            "expected_waste_cost": round(expected_waste_cost, 2),
+            "historical_waste_rate": round(historical_waste_rate, 4),
+            "safety_stock": round(safety_stock, 2),
+            "recommended_order_qty": recommended_order_qty,
+            "supplier_id": supplier_id,
+            "supplier_unit_cost": supplier_unit_cost,
+            "order_cost": round(recommended_order_qty * supplier_unit_cost, 2) if supplier_unit_cost is not None else None,
+        })
+    return records
+
+
+def iter_plan(tables: dict, product_id: str = None, horizon_days: int = DEFAULT_HORIZON_DAYS,
+              service_z: float = DEFAULT_SERVICE_Z, max_workers: int = None):
+    """Plan every product x location on a process pool, yielding records as each product completes.
+    Args:
+        tables (dict): Output of load_tables.
+        product_id (str): Restrict the plan to a single product. Plans all products if empty.
+        horizon_days (int): Number of days the order has to cover.
+        service_z (float): Safety factor applied to demand volatility.
+        max_workers (int): Size of the process pool. Defaults to the number of CPUs.
+    Yields:
+        dict: one plan record per product x location, in completion order.
+    """
+    work = partition_by_product(tables, product_id)
+    if not work:
+        return
+    # A pool is not worth starting for a single product
+    if len(work) == 1 or max_workers == 1:
+        for product, slices in work:
+            yield from plan_product(product, slices, horizon_days, service_z)
+        return
+    # Spawned workers do not inherit the threads of the calling process (e.g. the agent server's prefetch pool)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(plan_product, product, slices, horizon_days, service_z) for product, slices in work]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk replenishment plan for every product and location.")
+    parser.add_argument("--input-dir", default=None, help="Local folder with the csv files. Reads from the bucket if omitted.")
+    parser.add_argument("--product-id", default=None, help="Plan a single product only.")
+    parser.add_argument("--horizon-days", type=int, default=DEFAULT_HORIZON_DAYS, help="Number of days the order has to cover.")
+    parser.add_argument("--service-z", type=float, default=DEFAULT_SERVICE_Z, help="Safety factor applied to demand volatility.")
+    parser.add_argument("--workers", type=int, default=None, help="Size of the process pool.")
+    parser.add_argument("--output", default=None, help="Output csv file. Writes to stdout if omitted.")
+    args = parser.parse_args(argv)
+
+    tables = load_tables(args.input_dir)
+    file = open(args.output, mode='w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(file, fieldnames=PLAN_FIELDS)
+        writer.writeheader()
+        for record in iter_plan(tables, args.product_id, args.horizon_days, args.service_z, args.workers):
+            writer.writerow(record)
+            # Stream each row as soon as its product completes
+            file.flush()
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())